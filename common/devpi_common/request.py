@@ -4,19 +4,24 @@ from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, RequestException, BaseHTTPError, SSLError
 
 class RetrySession(Session):
-    def __init__(self, max_retries):
+    def __init__(self, max_retries, pool_maxsize=None):
         super(RetrySession, self).__init__()
+        kwargs = {}
         if max_retries is not None:
-            self.mount('https://', HTTPAdapter(max_retries=max_retries))
-            self.mount('http://', HTTPAdapter(max_retries=max_retries))
+            kwargs["max_retries"] = max_retries
+        if pool_maxsize is not None:
+            kwargs["pool_maxsize"] = pool_maxsize
+        if kwargs:
+            self.mount('https://', HTTPAdapter(**kwargs))
+            self.mount('http://', HTTPAdapter(**kwargs))
 
-def new_requests_session(agent=None, max_retries=None):
+def new_requests_session(agent=None, max_retries=None, pool_maxsize=None):
     if agent is None:
         agent = "devpi"
     else:
         agent = "devpi-%s/%s" % agent
     agent += " (py%s; %s)" % (sys.version.split()[0], sys.platform)
-    session = RetrySession(max_retries)
+    session = RetrySession(max_retries, pool_maxsize=pool_maxsize)
     session.headers["user-agent"] = agent
     session.ConnectionError = ConnectionError
     session.RequestException = RequestException
@@ -142,7 +142,7 @@ class URL:
     def get_query_items(self, *args, **kwargs):
         return parse_qsl(self.query, *args, **kwargs)
 
-    @property
+    @cached_property
     def basename(self):
         return posixpath.basename(unquote(self._parsed.path))
 
@@ -0,0 +1 @@
+``new_requests_session`` accepts a ``pool_maxsize`` argument to set the size of the connection pool of its adapters.
@@ -27,6 +27,15 @@ def test_env(monkeypatch, max_retries):
     assert tuple(increment_retry_totals) in ((0,), (2, 1, 0))
 
 
+@pytest.mark.parametrize('max_retries', [None, 2])
+def test_pool_maxsize(max_retries):
+    session = new_requests_session(max_retries=max_retries, pool_maxsize=7)
+    adapter = session.get_adapter("https://example.com")
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 7
+    if max_retries is not None:
+        assert adapter.max_retries.total == max_retries
+
+
 def test_useragent():
     s = new_requests_session(agent=("hello", "1.2"))
     ua = s.headers["user-agent"]
@@ -7,16 +7,28 @@ toxresult storage.
 
 from __future__ import unicode_literals
 
+import logging
+import posixpath
+import threading
 import time
 
 import re
 from devpi_common.vendor._pip import HTMLPage
+try:
+    from lxml.html import fromstring as html_fromstring
+    from lxml.etree import ParserError
+except ImportError:
+    html_fromstring = None
 
 from devpi_common.url import URL
 from devpi_common.metadata import BasenameMeta
 from devpi_common.metadata import is_archive_of_project
-from devpi_common.validation import normalize_name
+from devpi_common.validation import normalize_name as _normalize_name
+from functools import lru_cache
 from functools import partial
+from operator import itemgetter
+from repoze.lru import LRUCache
+from urllib.parse import unquote
 from .config import hookimpl
 from .model import BaseStageCustomizer
 from .model import BaseStage, make_key_and_href, SimplelinkMeta
@@ -26,17 +38,83 @@ from .readonly import ensure_deeply_readonly
 from .log import threadlog
 
 
+# project names are normalized over and over again for every request
+normalize_name = lru_cache(maxsize=200000)(_normalize_name)
+
+
 class Link(URL):
     def __init__(self, url="", *args, **kwargs):
         self.requires_python = kwargs.pop('requires_python', None)
         URL.__init__(self, url, *args, **kwargs)
 
 
+def _iter_links_lxml(doc, base):
+    """ yield (url, requires_python) tuples for all anchors of the
+    lxml document, with urls made absolute relative to ``base``. """
+    doc.make_links_absolute(base, handle_failures="discard")
+    for el, attrib, link, pos in doc.iterlinks():
+        if attrib == "href" and el.tag == "a":
+            yield (link, el.get("data-requires-python") or None)
+
+
+def iter_links(html, base):
+    """ return iterator of (url, requires_python) tuples for all anchors
+    of the html page.  Uses lxml if it is installed and falls back to
+    the vendored pure Python parser otherwise. """
+    if html_fromstring is not None:
+        try:
+            doc = html_fromstring(html)
+        except (ParserError, ValueError):
+            threadlog.debug("lxml failed to parse %s, falling back", base)
+        else:
+            return _iter_links_lxml(doc, base)
+    return (
+        (link.url, link.requires_python)
+        for link in HTMLPage(html, base).links)
+
+
+# suffixes which are always accepted by is_archive_of_project
+_ARCHIVE_SUFFIXES = ('.tar.gz', '.zip', '.whl', '.tar.bz2', '.egg')
+
+
+# matches the path of http(s) urls for which urlparse gives the same result
+_http_url_path_rx = re.compile(
+    r'^https?://[^/?#;\s]*(/[^?#;\s]*)?(?:[?#]|\Z)', re.IGNORECASE)
+
+
+def _is_http_url(url):
+    # cheap check of the scheme before constructing an URL object
+    return url[:5].lower() in ("http:", "https")
+
+
+def _get_basename(url):
+    """ return same as ``URL(url).basename`` but without fully parsing
+    the url in the common cases. """
+    m = _http_url_path_rx.match(url)
+    if m is None:
+        return URL(url).basename
+    return posixpath.basename(unquote(m.group(1) or ""))
+
+
 class IndexParser:
 
     def __init__(self, project):
         self.project = normalize_name(project)
+        self.project_prefix = self.project + "-"
         self.basename2link = {}
+        self._basename2isarchive = {}
+        self._releaselinks = None
+
+    def _is_archive(self, basename):
+        lower = basename.lower()
+        if lower.startswith(self.project_prefix) and lower.endswith(_ARCHIVE_SUFFIXES):
+            return True
+        try:
+            return self._basename2isarchive[basename]
+        except KeyError:
+            result = is_archive_of_project(basename, self.project)
+            self._basename2isarchive[basename] = result
+            return result
 
     def _mergelink_ifbetter(self, newlink):
         """
@@ -47,36 +125,49 @@ class IndexParser:
         As soon as the first link with hash_spec is encountered, those that
         appear later are ignored.
         """
-        entry = self.basename2link.get(newlink.basename)
-        if entry is None or not entry.hash_spec and (newlink.hash_spec or (
-            not entry.requires_python and newlink.requires_python
-        )):
-            self.basename2link[newlink.basename] = newlink
-            threadlog.debug("indexparser: adding link %s", newlink)
+        # this is called for every link of a project, so avoid
+        # the logging overhead if debug logging is disabled
+        debug = threadlog.isEnabledFor(logging.DEBUG)
+        basename = newlink.basename
+        entry = self.basename2link.get(basename)
+        if entry is None:
+            self.basename2link[basename] = (newlink, BasenameMeta(basename))
         else:
-            threadlog.debug("indexparser: ignoring candidate link %s", newlink)
+            (link, bmeta) = entry
+            if link.hash_spec or not (newlink.hash_spec or (
+                not link.requires_python and newlink.requires_python
+            )):
+                if debug:
+                    threadlog.debug(
+                        "indexparser: ignoring candidate link %s", newlink)
+                return
+            self.basename2link[basename] = (newlink, bmeta)
+        self._releaselinks = None
+        if debug:
+            threadlog.debug("indexparser: adding link %s", newlink)
 
     @property
     def releaselinks(self):
         """ return sorted releaselinks list """
-        l = sorted(map(BasenameMeta, self.basename2link.values()),
-                   reverse=True)
-        return [x.obj for x in l]
+        if self._releaselinks is None:
+            self._releaselinks = [
+                link for link, bmeta in sorted(
+                    self.basename2link.values(), key=itemgetter(1),
+                    reverse=True)]
+        return self._releaselinks
 
     def parse_index(self, disturl, html):
-        p = HTMLPage(html, disturl.url)
         seen = set()
-        for link in p.links:
-            newurl = Link(link.url, requires_python=link.requires_python)
+        for url, requires_python in iter_links(html, disturl.url):
+            if not _is_http_url(url):
+                continue
+            if not self._is_archive(_get_basename(url)):
+                continue
+            newurl = Link(url, requires_python=requires_python)
             if not newurl.is_valid_http_url():
                 continue
-            if is_archive_of_project(newurl, self.project):
-                if not newurl.is_valid_http_url():
-                    threadlog.warn("unparseable/unsupported url: %r", newurl)
-                else:
-                    seen.add(newurl.url)
-                    self._mergelink_ifbetter(newurl)
-                    continue
+            seen.add(newurl.url)
+            self._mergelink_ifbetter(newurl)
 
 
 def parse_index(disturl, html):
@@ -173,6 +264,7 @@ class PyPIStage(BaseStage):
             for entry in entries:
                 entry.delete()
         self.key_projsimplelinks(project).delete()
+        self.cache_simplelinks.invalidate(project)
         projects = self.key_projects.get(readonly=False)
         if project in projects:
             projects.remove(project)
@@ -236,6 +328,18 @@ class PyPIStage(BaseStage):
             self.xom.set_singleton(self.name, "project_retrieve_times", c)
             return c
 
+    @property
+    def cache_simplelinks(self):
+        """ per-xom RAM cache of simplelinks per project and keyfs serial. """
+        # avoids reading and converting the same data from keyfs for
+        # every request as long as nothing was written
+        try:
+            return self.xom.get_singleton(self.name, "project_simplelinks")
+        except KeyError:
+            c = ProjectSimplelinksCache()
+            self.xom.set_singleton(self.name, "project_simplelinks", c)
+            return c
+
     def _get_remote_projects(self):
         headers = {"Accept": "text/html"}
         # use a minimum of 30 seconds as timeout for remote server and
@@ -251,12 +355,13 @@ class PyPIStage(BaseStage):
         if response.status_code != 200:
             raise self.UpstreamError("URL %r returned %s %s",
                 self.mirror_url, response.status_code, response.reason)
-        page = HTMLPage(response.text, response.url)
         projects = set()
         baseurl = URL(response.url)
         basehost = baseurl.replace(path='')
-        for link in page.links:
-            newurl = URL(link.url)
+        for url, requires_python in iter_links(response.text, response.url):
+            if not _is_http_url(url):
+                continue
+            newurl = URL(url)
             # remove trailing slashes, so basename works correctly
             newurl = newurl.asfile()
             if not newurl.is_valid_http_url():
@@ -268,6 +373,14 @@ class PyPIStage(BaseStage):
             projects.add(newurl.basename)
         return projects
 
+    def sorted_projectnames(self, projects):
+        # the unfiltered projects list usually is the cached snapshot,
+        # for which a sorted list is kept by the cache
+        cache_projectnames = self.cache_projectnames
+        if projects is cache_projectnames.get():
+            return cache_projectnames.get_sorted()
+        return sorted(projects)
+
     def list_projects_perstage(self):
         """ return set of all projects served through the mirror. """
         if self.offline:
@@ -319,6 +432,7 @@ class PyPIStage(BaseStage):
         if old != data:
             threadlog.debug("saving changed simplelinks for %s: %s", project, data)
             key.set(data)
+            self.cache_simplelinks.invalidate(project)
             # maintain list of currently cached project names to enable
             # deletion and offline mode
             self.add_project_name(project)
@@ -332,12 +446,24 @@ class PyPIStage(BaseStage):
     def _load_cache_links(self, project):
         is_expired, links_with_require_python, serial = True, None, -1
 
-        cache = self.key_projsimplelinks(project).get()
-        if cache:
+        tx = self.keyfs.tx
+        # the cache is only valid for read transactions, because in write
+        # transactions the key might have been changed without a new serial
+        cached = None
+        if not tx.write:
+            cached = self.cache_simplelinks.get(project, tx.at_serial)
+        if cached is None:
+            cache = self.key_projsimplelinks(project).get()
+            if cache:
+                cached = (cache["serial"], ensure_deeply_readonly(join_requires(
+                    cache["links"], cache.get("requires_python", []))))
+            else:
+                cached = (-1, None)
+            if not tx.write:
+                self.cache_simplelinks.set(project, tx.at_serial, cached)
+        (serial, links_with_require_python) = cached
+        if links_with_require_python is not None:
             is_expired = self.cache_retrieve_times.is_expired(project, self.cache_expiry)
-            serial = cache["serial"]
-            links_with_require_python = join_requires(
-                cache["links"], cache.get("requires_python", []))
             if self.offline and links_with_require_python:
                 links_with_require_python = ensure_deeply_readonly(list(
                     filter(self._is_file_cached, links_with_require_python)))
@@ -357,6 +483,7 @@ class PyPIStage(BaseStage):
         # we have to set to an empty dict instead of removing the key, so
         # replicas behave correctly
         self.cache_retrieve_times.expire(project)
+        self.cache_simplelinks.invalidate(project)
         self.key_projsimplelinks(project).set({})
         threadlog.debug("cleared cache for %s", project)
 
@@ -457,7 +584,7 @@ class PyPIStage(BaseStage):
             # make project appear in projects list even
             # before we next check up the full list with remote
             threadlog.info("setting projects cache for %r", project)
-            self.cache_projectnames.get_inplace().add(project)
+            self.cache_projectnames.add(project)
             return join_requires(links, requires_python)
 
         try:
@@ -525,17 +652,20 @@ class PyPIStage(BaseStage):
     def get_versiondata_perstage(self, project, version, readonly=True):
         project = normalize_name(project)
         verdata = {}
+        elinks = []
+        requires_python = None
         for sm in map(SimplelinkMeta, self.get_simplelinks_perstage(project)):
-            link_version = sm.version
-            if version == link_version:
-                if not verdata:
-                    verdata['name'] = project
-                    verdata['version'] = version
-                if sm.require_python is not None:
-                    verdata['requires_python'] = sm.require_python
-                elinks = verdata.setdefault("+elinks", [])
-                entrypath = sm._url.path
-                elinks.append({"rel": "releasefile", "entrypath": entrypath})
+            if sm.version != version:
+                continue
+            if sm.require_python is not None:
+                requires_python = sm.require_python
+            elinks.append({"rel": "releasefile", "entrypath": sm._url.path})
+        if elinks:
+            verdata['name'] = project
+            verdata['version'] = version
+            if requires_python is not None:
+                verdata['requires_python'] = requires_python
+            verdata['+elinks'] = elinks
         if readonly:
             return ensure_deeply_readonly(verdata)
         return verdata
@@ -555,8 +685,11 @@ def devpiserver_get_stage_customizer_classes():
 class ProjectNamesCache:
     """ Helper class for maintaining project names from a mirror. """
     def __init__(self):
+        self._lock = threading.Lock()
         self._timestamp = -1
         self._data = set()
+        self._snapshot = None
+        self._sorted = None
 
     def exists(self):
         return self._timestamp != -1
@@ -564,18 +697,62 @@ class ProjectNamesCache:
     def is_expired(self, expiry_time):
         return (time.time() - self._timestamp) >= expiry_time
 
+    def _invalidate(self):
+        # must be called with the lock held after the data was changed
+        self._snapshot = None
+        self._sorted = None
+
     def get(self):
-        """ Get a copy of the cached data. """
-        return set(self._data)
+        """ Get an immutable copy of the cached data.
+
+        The copy is reused until the data changes. """
+        snapshot = self._snapshot
+        if snapshot is None:
+            # building and storing the copy under the lock prevents
+            # storing a stale copy if the data is changed concurrently
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    snapshot = self._snapshot = frozenset(self._data)
+        return snapshot
+
+    def get_sorted(self):
+        """ Get a sorted list of the cached data.
+
+        The list is reused until the data changes, it must not be modified. """
+        snapshot = self.get()
+        cached = self._sorted
+        if cached is None or cached[0] is not snapshot:
+            cached = self._sorted = (snapshot, sorted(snapshot))
+        return cached[1]
 
     def get_inplace(self):
-        """ Get cached data in-place. """
+        """ Get cached data in-place.
+
+        Use add() and discard() for changes, so the cached copies
+        are updated as well. """
         return self._data
 
+    def add(self, name):
+        """ Add name to cached data. """
+        if name not in self._data:
+            with self._lock:
+                self._data.add(name)
+                self._invalidate()
+
+    def discard(self, name):
+        """ Remove name from cached data if present. """
+        if name in self._data:
+            with self._lock:
+                self._data.discard(name)
+                self._invalidate()
+
     def set(self, data):
         """ Set data and update timestamp. """
-        if data is not self._data:
-            self._data = data.copy()
+        with self._lock:
+            if data is not self._data:
+                self._data = set(data)
+            self._invalidate()
         self.mark_current()
 
     def mark_current(self):
@@ -601,3 +778,21 @@ class ProjectUpdateCache:
 
     def expire(self, project):
         self._project2time.pop(project, None)
+
+
+class ProjectSimplelinksCache:
+    """ Helper class for caching simplelinks of projects at a keyfs serial. """
+    def __init__(self, size=4096):
+        self._cache = LRUCache(size)  # is thread safe
+
+    def get(self, project, at_serial):
+        """ Get cached data if it was stored at the given serial. """
+        entry = self._cache.get(project)
+        if entry is not None and entry[0] == at_serial:
+            return entry[1]
+
+    def set(self, project, at_serial, data):
+        self._cache.put(project, (at_serial, data))
+
+    def invalidate(self, project):
+        self._cache.invalidate(project)
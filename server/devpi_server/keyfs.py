@@ -613,7 +613,7 @@ class Transaction(object):
     def rollback(self):
         if hasattr(self.conn, 'rollback'):
             self.conn.rollback()
-        threadlog.debug("transaction rollback at %s" % (self.at_serial))
+        threadlog.debug("transaction rollback at %s", self.at_serial)
         return self._close()
 
     def restart(self, write=False):
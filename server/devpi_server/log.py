@@ -58,6 +58,9 @@ class TagLogger:
         return self.__class__(self._logout, prefix=self._prefix + tag + " ",
                               last=self)
 
+    def isEnabledFor(self, level):
+        return self._logout.isEnabledFor(level)
+
     def debug(self, msg, *args):
         self._logout.debug(self._prefix + msg, *args)
 
@@ -267,15 +267,22 @@ class XOM:
             self.thread_pool.register(keyfs.notifier)
         return keyfs
 
-    def new_http_session(self, component_name, max_retries=None):
-        session = new_requests_session(agent=(component_name, server_version), max_retries=max_retries)
+    def new_http_session(self, component_name, max_retries=None, pool_maxsize=None):
+        session = new_requests_session(
+            agent=(component_name, server_version),
+            max_retries=max_retries, pool_maxsize=pool_maxsize)
         session.cert = self.config.replica_cert
         return session
 
     @cached_property
     def _httpsession(self):
-        max_retries = self.config.replica_max_retries
-        return self.new_http_session("server", max_retries=max_retries)
+        # the session is shared by all serving threads, so keep enough
+        # connections in the pool to avoid new TLS handshakes to
+        # the mirror or master when they are busy
+        return self.new_http_session(
+            "server",
+            max_retries=self.config.replica_max_retries,
+            pool_maxsize=self.config.args.threads)
 
     def httpget(self, url, allow_redirects, timeout=None, extra_headers=None):
         if self.config.offline_mode:
@@ -797,6 +797,10 @@ class BaseStage(object):
             return projects
         return frozenset(apply_filter_iter(projects, iterator))
 
+    def sorted_projectnames(self, projects):
+        """ return sorted list of the given project names of this stage. """
+        return sorted(projects)
+
     def has_project(self, project):
         if not self.filter_projects([project]):
             return False
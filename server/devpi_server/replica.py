@@ -127,10 +127,10 @@ class MasterChangelogRequest:
                 all_changes.append((serial, changes))
                 now = time.time()
                 if raw_size > self.MAX_REPLICA_CHANGES_SIZE:
-                    threadlog.debug('Changelog raw size %s' % raw_size)
+                    threadlog.debug('Changelog raw size %s', raw_size)
                     break
                 if (now - start_time) > (self.REPLICA_MULTIPLE_TIMEOUT):
-                    threadlog.debug('Changelog timeout %s' % raw_size)
+                    threadlog.debug('Changelog timeout %s', raw_size)
                     break
             raw_entry = dumps(all_changes)
             r = Response(body=raw_entry, status=200, headers={
@@ -334,7 +334,7 @@ class SimpleLinksChanged:
         with self.xom.keyfs.transaction(write=False):
             mirror_stage = self.xom.model.getstage(username, index)
             if mirror_stage and mirror_stage.ixconfig["type"] == "mirror":
-                cache_projectnames = mirror_stage.cache_projectnames.get_inplace()
+                cache_projectnames = mirror_stage.cache_projectnames
                 if cache is None:  # deleted
                     cache_projectnames.discard(project)
                 else:
@@ -181,7 +181,7 @@ class DevpiAuthenticationPolicy(CallbackAuthenticationPolicy):
         credentials = self._get_credentials(request)
         if credentials:
             status, auth_user, groups = self.auth.get_auth_status(credentials)
-            request.log.debug("got auth status %r for user %r" % (status, auth_user))
+            request.log.debug("got auth status %r for user %r", status, auth_user)
             if status == "ok":
                 return [":%s" % g for g in groups]
             elif status == "reject":
@@ -603,7 +603,7 @@ class PyPIView:
             if bases:
                 h2 += " (bases: %s)" % ",".join(bases)
             yield ("<h2>" + h2 + "</h2>").encode("utf-8")
-            for name in sorted(names):
+            for name in stage.sorted_projectnames(names):
                 if name not in all_names:
                     anchor = '<a href="%s/">%s</a><br/>\n' % (name, name)
                     yield anchor.encode("utf-8")
@@ -1218,7 +1218,8 @@ class PyPIView:
         # double negation :(
         add_projects = 'no_projects' not in self.request.GET
         if add_projects:
-            result['projects'] = sorted(stage.list_projects_perstage())
+            result['projects'] = stage.sorted_projectnames(
+                stage.list_projects_perstage())
         apireturn(200, type="indexconfig", result=result)
 
     #
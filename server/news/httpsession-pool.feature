@@ -0,0 +1 @@
+The HTTP connection pool used for requests to the mirrored index or master now has room for as many connections as there are serving threads (``--threads``), so connections are reused instead of re-established when many requests arrive at once.
@@ -0,0 +1 @@
+Use ``lxml`` for parsing simple pages of mirrors if it is installed, which is much faster for projects with many releases. It can be installed with the ``devpi-server[lxml]`` extra.
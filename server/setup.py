@@ -40,7 +40,8 @@ if __name__ == "__main__":
                         'ruamel.yaml<=0.15.94;python_version=="3.4"',
                         "strictyaml",
                         ]
-    extras_require = {}
+    extras_require = {
+        "lxml": ["lxml"]}
 
     setup(
       name="devpi-server",
@@ -1,11 +1,13 @@
 from __future__ import unicode_literals
 import requests.exceptions
+import threading
 import time
 import hashlib
 import pytest
 
 from devpi_server.extpypi import URL, parse_index
 from devpi_server.extpypi import ProjectNamesCache, ProjectUpdateCache
+from devpi_server.extpypi import ProjectSimplelinksCache
 from test_devpi_server.simpypi import getmd5
 
 
@@ -187,6 +189,17 @@ class TestIndexParsing:
         assert links[0].url == "https://pypi.org/pkg/py-1.4.12.zip#md5=12ab"
         assert links[1].url == "http://pylib.org/py-1.1-py27.egg"
 
+    def test_releaselinks_cached_until_changed(self):
+        result = parse_index(self.simplepy,
+            """<a href="../../pkg/py-1.4.12.zip">qwe</a>""")
+        links = result.releaselinks
+        assert result.releaselinks is links
+        result.parse_index(self.simplepy,
+            """<a href="../../pkg/py-1.4.12.zip#md5=12ab">qwe</a>""")
+        assert result.releaselinks is not links
+        link, = result.releaselinks
+        assert link.hash_spec == "md5=12ab"
+
     def test_releasefile_and_scrape_no_ftp(self):
         result = parse_index(self.simplepy,
             """<a href="ftp://pylib2.org/py-1.0.tar.gz"
@@ -217,6 +230,62 @@ class TestIndexParsing:
         assert link2.url == "http://pylib.org/py-1.4.11.zip#md5=1111"
         assert link3.url == "https://pypi.org/pkg/py-1.4.10.zip#md5=2222"
 
+
+@pytest.mark.parametrize("basename", [
+    "py-1.0.zip", "PY-1.0.tar.gz", "py-1.0-py3-none-any.whl", "py.tar.gz",
+    "py-0.8.msi", "py_foo-1.0.zip", "py-1.0.html", "pytest-1.0.zip",
+    "other-1.0.zip"])
+def test_indexparser_is_archive(basename):
+    from devpi_common.metadata import is_archive_of_project
+    from devpi_server.extpypi import IndexParser
+    parser = IndexParser("py")
+    expected = is_archive_of_project(basename, "py")
+    assert parser._is_archive(basename) == expected
+    # second lookup may come from the cache
+    assert parser._is_archive(basename) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "https://pypi.org/pkg/py-1.0.zip",
+    "https://pypi.org/pkg/py-1.0.zip#md5=12ab",
+    "HTTP://pypi.org/pkg/py-1.0.zip?x=1#md5=12ab",
+    "https://pypi.org/pkg/py%2D1.0.zip",
+    "https://pypi.org/pkg/foo%2Fpy-1.0.zip",
+    "https://pypi.org/pkg/py-1.0.zip;params",
+    "https://pypi.org/pkg/",
+    "https://pypi.org",
+    "https:/pypi.org/py-1.0.zip",
+    "http:",
+    "https://pypi.org/simple/py/qlkwje 1lk23j123123"])
+def test_get_basename(url):
+    from devpi_server.extpypi import _get_basename
+    assert _get_basename(url) == URL(url).basename
+
+
+@pytest.mark.parametrize("use_lxml", [True, False])
+def test_iter_links(monkeypatch, use_lxml):
+    from devpi_server import extpypi
+    if use_lxml:
+        pytest.importorskip("lxml")
+    else:
+        monkeypatch.setattr(extpypi, "html_fromstring", None)
+    links = list(extpypi.iter_links("""
+        <html><body>
+        <a href="../../pkg/py-1.0.zip#md5=12ab">py-1.0.zip</a>
+        <a href="py-1.1.zip" data-requires-python="&gt;=3.5">py-1.1.zip</a>
+        <img src="logo.png" />
+        </body></html>""", "https://pypi.org/simple/py/"))
+    assert links == [
+        ("https://pypi.org/pkg/py-1.0.zip#md5=12ab", None),
+        ("https://pypi.org/simple/py/py-1.1.zip", ">=3.5")]
+
+
+def test_iter_links_lxml_fallback():
+    pytest.importorskip("lxml")
+    from devpi_server.extpypi import iter_links
+    assert list(iter_links("", "https://pypi.org/simple/py/")) == []
+
+
 def test_get_updated(pypistage):
     c = pypistage.cache_retrieve_times
     c2 = pypistage.cache_retrieve_times
@@ -259,6 +328,61 @@ class TestExtPYPIDB:
         assert data["version"] == "1.0"
         assert pypistage.has_project_perstage("pytest")
 
+    @pytest.mark.notransaction
+    def test_simplelinks_cache(self, pypistage):
+        keyfs = pypistage.keyfs
+        cache = pypistage.cache_simplelinks
+        with keyfs.transaction(write=False):
+            pypistage.mock_simple("pkg", pkgver="pkg-1.0.zip")
+            (link,) = pypistage.get_simplelinks_perstage("pkg")
+            assert link[0] == "pkg-1.0.zip"
+        # a read transaction at the same serial uses the cache
+        with keyfs.transaction(write=False) as tx:
+            links = pypistage.get_simplelinks_perstage("pkg")
+            assert cache.get("pkg", tx.at_serial) is not None
+            assert pypistage.get_simplelinks_perstage("pkg") is links
+        # a commit changes the serial and the cached entry isn't used
+        with keyfs.transaction(write=True):
+            pypistage.mock_simple("pkg", pkgver="pkg-1.1.zip", pypiserial=10001)
+            (link,) = pypistage.get_simplelinks_perstage("pkg")
+            assert link[0] == "pkg-1.1.zip"
+        with keyfs.transaction(write=False) as tx:
+            assert cache.get("pkg", tx.at_serial) is None
+            (link,) = pypistage.get_simplelinks_perstage("pkg")
+            assert link[0] == "pkg-1.1.zip"
+            assert cache.get("pkg", tx.at_serial) is not None
+        # write transactions neither use nor fill the cache
+        with keyfs.transaction(write=True) as tx:
+            cache.set("pkg", tx.at_serial, (0, [("bogus", "bogus", None)]))
+            (link,) = pypistage.get_simplelinks_perstage("pkg")
+            assert link[0] == "pkg-1.1.zip"
+            cache.invalidate("pkg")
+            pypistage.get_simplelinks_perstage("pkg")
+            assert cache.get("pkg", tx.at_serial) is None
+        # saving and clearing links invalidates the cache
+        with keyfs.transaction(write=True) as tx:
+            cache.set("pkg", tx.at_serial, (0, []))
+            pypistage.mock_simple("pkg", pkgver="pkg-1.2.zip", pypiserial=10002)
+            (link,) = pypistage.get_simplelinks_perstage("pkg")
+            assert link[0] == "pkg-1.2.zip"
+            assert cache.get("pkg", tx.at_serial) is None
+            cache.set("pkg", tx.at_serial, (0, []))
+            pypistage.clear_simplelinks_cache("pkg")
+            assert cache.get("pkg", tx.at_serial) is None
+
+    def test_get_versiondata_requires_python(self, pypistage):
+        pypistage.mock_simple("pytest", text='''
+                <a href="../../pkg/pytest-1.0.zip" data-requires-python="&gt;=3.5" />
+                <a href="../../pkg/pytest-1.1.zip" />
+            ''')
+        data = pypistage.get_versiondata("pytest", "1.0")
+        assert data["requires_python"] == ">=3.5"
+        assert len(data["+elinks"]) == 1
+        data = pypistage.get_versiondata("pytest", "1.1")
+        assert "requires_python" not in data
+        assert len(data["+elinks"]) == 1
+        assert not pypistage.get_versiondata("pytest", "2.0")
+
     def test_parse_with_external_link(self, pypistage):
         md5 = getmd5("123")
         pypistage.mock_simple("pytest", text='''
@@ -575,9 +699,63 @@ class TestProjectNamesCache:
         cache.set(s)
         s.add(4)
         assert cache.get() != s
-        s2 = cache.get_inplace()
-        s2.add(5)
+        cache.add(5)
         assert 5 in cache.get()
+        assert 5 in cache.get_inplace()
+        cache.discard(5)
+        assert 5 not in cache.get()
+
+    def test_get_snapshot(self, cache):
+        cache.set(set([1, 2, 3]))
+        s = cache.get()
+        assert cache.get() is s
+        # no changes keep the snapshot
+        cache.add(3)
+        cache.discard(7)
+        assert cache.get() is s
+        cache.add(4)
+        s2 = cache.get()
+        assert s2 is not s
+        assert s2 == set([1, 2, 3, 4])
+        cache.discard(1)
+        assert cache.get() == set([2, 3, 4])
+
+    def test_get_sorted(self, cache):
+        cache.set(set(["b", "c", "a"]))
+        l = cache.get_sorted()
+        assert l == ["a", "b", "c"]
+        assert cache.get_sorted() is l
+        cache.add("a")
+        assert cache.get_sorted() is l
+        cache.add("0")
+        assert cache.get_sorted() == ["0", "a", "b", "c"]
+        cache.discard("b")
+        assert cache.get_sorted() == ["0", "a", "c"]
+        cache.set(set(["x"]))
+        assert cache.get_sorted() == ["x"]
+
+    def test_get_concurrent_change(self, cache, monkeypatch):
+        from devpi_server import extpypi
+        cache.set(set(["a"]))
+        threads = []
+
+        def frozenset_with_concurrent_add(data):
+            result = frozenset(data)
+            if not threads:
+                # change the data after the copy was built, but before
+                # it is stored
+                thread = threading.Thread(target=cache.add, args=("b",))
+                threads.append(thread)
+                thread.start()
+                thread.join(0.1)
+            return result
+
+        monkeypatch.setattr(
+            extpypi, "frozenset", frozenset_with_concurrent_add, raising=False)
+        assert cache.get() == set(["a"])
+        threads[0].join()
+        assert cache.get() == set(["a", "b"])
+        assert cache.get_sorted() == ["a", "b"]
 
     def test_is_expired(self, cache, monkeypatch):
         expiry_time = 100
@@ -590,6 +768,19 @@ class TestProjectNamesCache:
         assert cache.get() == s
 
 
+def test_sorted_projectnames(pypistage):
+    pypistage.cache_projectnames.set(set(["hello2", "hello1"]))
+    names = pypistage.cache_projectnames.get()
+    result = pypistage.sorted_projectnames(names)
+    assert result == ["hello1", "hello2"]
+    assert pypistage.sorted_projectnames(names) is result
+    # other objects, like filtered project names, are sorted directly
+    other = pypistage.sorted_projectnames(frozenset(["hello2", "hello1"]))
+    assert other is not result
+    assert other == result
+    assert pypistage.sorted_projectnames(set(["b", "a"])) == ["a", "b"]
+
+
 def test_ProjectUpdateCache(monkeypatch):
     x = ProjectUpdateCache()
     expiry_time = 30
@@ -608,6 +799,17 @@ def test_ProjectUpdateCache(monkeypatch):
     assert x.get_timestamp("y") == t
 
 
+def test_ProjectSimplelinksCache():
+    x = ProjectSimplelinksCache()
+    assert x.get("x", 10) is None
+    x.set("x", 10, (5, []))
+    assert x.get("x", 10) == (5, [])
+    # different keyfs serial
+    assert x.get("x", 11) is None
+    x.invalidate("x")
+    assert x.get("x", 10) is None
+
+
 @pytest.mark.notransaction
 @pytest.mark.with_notifier
 @pytest.mark.nomocking
@@ -36,6 +36,13 @@ def test_taglogger_prefix(caplog):
 
     assert caplog.getrecords("hello this")
 
+def test_taglogger_isenabledfor():
+    logger = logging.getLogger("test_taglogger_isenabledfor")
+    logger.setLevel(logging.INFO)
+    log = TagLogger(logger, prefix="hello")
+    assert log.isEnabledFor(logging.INFO)
+    assert not log.isEnabledFor(logging.DEBUG)
+
 def test_taglogger_exception(taglogger, caplog):
     try:
         0/0
@@ -219,6 +219,23 @@ def test_offline_mode_httpget_returns_server_error(makexom, url, allowRedirect):
     assert r.status_code == 503
 
 
+@pytest.mark.nomocking
+def test_httpsession_pool_maxsize(makexom, monkeypatch):
+    from devpi_server.main import new_requests_session as orig_new_requests_session
+    calls = []
+
+    def new_requests_session(*args, **kwargs):
+        calls.append(kwargs)
+        return orig_new_requests_session(*args, **kwargs)
+
+    monkeypatch.setattr("devpi_server.main.new_requests_session", new_requests_session)
+    xom = makexom(["--threads=7", "--replica-max-retries=2"])
+    xom._httpsession
+    (kwargs,) = calls
+    assert kwargs["pool_maxsize"] == 7
+    assert kwargs["max_retries"] == 2
+
+
 @pytest.mark.nomocking
 def test_replica_max_retries_option(makexom, monkeypatch):
     from devpi_server.main import new_requests_session as orig_new_requests_session
@@ -1,4 +1,5 @@
 from __future__ import unicode_literals
+from html import escape
 import io
 import py
 import readme_renderer.markdown
@@ -6,6 +7,11 @@ import readme_renderer.rst
 import readme_renderer.txt
 
 
+MIRROR_DESCRIPTION = (
+    '<div>Please refer to description on remote server '
+    '<a href="{url}">{url}</a></div>')
+
+
 def get_description(stage, name, version):
     return DescriptionRenderer(
         stage, name, version).get_description()
@@ -66,10 +72,7 @@ class DescriptionRenderer:
         link = self._get_mirror_web_url_fmt().format(
             name=self.name).rstrip('/') + '/%s/' % self.version
 
-        html = py.xml.html
-        return html.div(
-            'Please refer to description on remote server ',
-            html.a(link, href=link)).unicode(indent=2)
+        return MIRROR_DESCRIPTION.format(url=escape(link, quote=True))
 
     def _render_description(self, desc):
         """ Render a markdown or RST description.
@@ -128,7 +128,7 @@ def remove_docs(stage, project, version):
         return
     directory = get_unpack_path(stage, project, version).strpath
     if not os.path.isdir(directory):
-        threadlog.debug("ignoring lost unpacked docs: %s" % directory)
+        threadlog.debug("ignoring lost unpacked docs: %s", directory)
     else:
-        threadlog.debug("removing unpacked docs: %s" % directory)
+        threadlog.debug("removing unpacked docs: %s", directory)
         shutil.rmtree(directory)
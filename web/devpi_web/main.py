@@ -323,8 +323,9 @@ def devpiserver_on_changed_versiondata(stage, project, version, metadata):
         if versions:
             version = get_latest_version(versions)
             if version:
-                threadlog.debug("A version of %s was deleted, using latest version %s for indexing" % (
-                    project, version))
+                threadlog.debug(
+                    "A version of %s was deleted, using latest version %s for indexing",
+                    project, version)
                 metadata = stage.get_versiondata(project, version)
     if metadata:
         index_project(stage, metadata['name'])
@@ -1025,7 +1025,7 @@ class SearchView:
         else:
             fields = data
             operator = "and"
-        log.debug("xmlrpc_search {0}".format((fields, operator)))
+        log.debug("xmlrpc_search %s", (fields, operator))
         return dict(fields=fields, operator=operator)
 
     @view_config(
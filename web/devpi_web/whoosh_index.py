@@ -406,7 +406,7 @@ class IndexerThread(object):
             # let the queue handle retries
             raise
         else:
-            log.debug("Committing %s new documents to search index." % count)
+            log.debug("Committing %s new documents to search index.", count)
             writer.commit()
 
     def tick(self):
@@ -534,7 +534,7 @@ class Index(object):
             path = u"/%s/%s" % (project.indexname, project.name)
             count = next(counter)
             writer.delete_by_term('path', path, searcher=searcher)
-        log.debug("Committing %s deletions to search index." % count)
+        log.debug("Committing %s deletions to search index.", count)
         writer.commit()
         log.info("Finished committing %s deletions to search index." % count)
 
@@ -824,7 +824,7 @@ class Index(object):
             else:
                 raise ValueError("Only one value allowed for query.")
         querystring = (" %s " % operator).join(parts)
-        log.debug("_querystring {0}".format(querystring))
+        log.debug("_querystring %s", querystring)
         return querystring
 
     def query_packages(self, searchinfo, sro):
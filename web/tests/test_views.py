@@ -387,6 +387,23 @@ def test_version_view(mapp, testapp, monkeypatch):
         ('user1/dev', 'http://localhost/user1/dev')]
 
 
+def test_mirror_description():
+    from devpi_web.description import get_description
+
+    class Stage:
+        ixconfig = dict(
+            type="mirror",
+            mirror_web_url_fmt="https://pypi.org/project/{name}/")
+
+        def get_versiondata(self, name, version):
+            return {}
+
+    assert get_description(Stage(), "pkg&x", "1.0") == (
+        '<div>Please refer to description on remote server '
+        '<a href="https://pypi.org/project/pkg&amp;x/1.0/">'
+        'https://pypi.org/project/pkg&amp;x/1.0/</a></div>')
+
+
 @pytest.mark.with_notifier
 def test_markdown_description_without_content_type(mapp, testapp, monkeypatch):
     api = mapp.create_and_use()